@@ -1,16 +1,87 @@
 import streamlit as st
 import networkx as nx
-import community as community_louvain  # This is the python-louvain library
 from pyvis.network import Network
 import os
 import streamlit.components.v1 as components  # Import components
 import pandas as pd  # <-- FIX 1: Added pandas back for the bridge table
+import numpy as np
+import hashlib
+import io
+import tempfile
+import joblib
+from collections import Counter, defaultdict
+from itertools import chain
+
+# Louvain backends, in order of preference (see run_louvain)
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
+try:
+    import louvain_numba
+except ImportError:  # Also raised when Numba itself is missing
+    louvain_numba = None
+try:
+    import community as community_louvain  # This is the python-louvain library
+except ImportError:
+    community_louvain = None
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the kernels then run as plain Python
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 
 # --- Constants ---
 # Get the absolute path of the directory containing this script
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-# We still need a place to save the temp viz file
-HTML_VIZ_PATH = os.path.join(SCRIPT_DIR, "graph_visualization.html")
+# Disk cache for community detection results, keyed by graph hash
+ANALYSIS_CACHE_DIR = os.path.join(SCRIPT_DIR, ".cache")
+# Part of the disk-cache key; joblib only notices edits to the cached
+# function itself, so bump this whenever community detection or any of
+# the cached metrics (bridges, M, modularity counts) change
+ANALYSIS_CACHE_VERSION = 1
+# The least recently used analyses are evicted past this size
+ANALYSIS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Rendered graphs, served by Streamlit under app/static (server.enableStaticServing)
+STATIC_DIR = os.path.join(SCRIPT_DIR, "static")
+# Rendered graphs kept in STATIC_DIR; the least recently used are pruned
+STATIC_GRAPH_MAX_FILES = 64
+# Graphs with at least this many nodes use the Numba Louvain kernel
+NUMBA_LOUVAIN_MIN_NODES = 5000
+# Minimum modularity gain before an added edge triggers a local re-Louvain
+LOCAL_LOUVAIN_MIN_GAIN = 1e-6
+# Pyvis physics/layout options, assigned as an already-parsed dict
+PYVIS_OPTIONS_DICT = {
+    "nodes": {
+        "borderWidth": 2,
+        "borderWidthSelected": 4,
+    },
+    "edges": {
+        "color": {
+            "inherit": "from",
+        },
+        "smooth": {
+            "type": "continuous",
+        },
+    },
+    "physics": {
+        "forceAtlas2Based": {
+            "gravitationalConstant": -50,
+            "centralGravity": 0.01,
+            "springLength": 100,
+            "springConstant": 0.08,
+        },
+        "minVelocity": 0.75,
+        "solver": "forceAtlas2Based",
+    },
+}
+
+memory = joblib.Memory(location=ANALYSIS_CACHE_DIR, verbose=0)
 
 
 # --- Page Configuration ---
@@ -23,19 +94,75 @@ st.set_page_config(
 # --- Helper Functions ---
 
 
+def compute_graph_hash(G):
+    """
+    Returns a digest of an int-labeled graph, independent of edge order.
+    The cached analysis is indexed by node id, so besides the int edge set
+    the digest covers the original label behind every id; labels are
+    length-prefixed so no two label sequences hash alike.
+    """
+    n = G.number_of_nodes()
+    edges = np.array(list(G.edges()), dtype=np.int64).reshape(-1, 2)
+    edges.sort(axis=1)
+    edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+
+    h = hashlib.blake2b()
+    h.update(np.int64(n).tobytes())
+    h.update(edges.tobytes())
+    for i in range(n):
+        label = str(G.nodes[i].get("orig", i)).encode("utf-8")
+        h.update(len(label).to_bytes(8, "little"))
+        h.update(label)
+    return h.hexdigest()
+
+
+def parse_edgelist_fast(raw):
+    """
+    Parses an edgelist with pandas' C CSV parser.
+    Commas are used as the delimiter if the first data line contains one,
+    otherwise any run of whitespace. Columns past the first two are ignored.
+    """
+    first_line = next(
+        (
+            line
+            for line in raw[:4096].decode("utf-8", errors="ignore").splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ),
+        "",
+    )
+    sep = "," if "," in first_line else r"\s+"
+    df = pd.read_csv(
+        io.BytesIO(raw),
+        sep=sep,
+        header=None,
+        usecols=[0, 1],
+        names=["u", "v"],
+        dtype=str,
+        comment="#",
+        skipinitialspace=True,
+        engine="c",
+    )
+    df = df.dropna()
+    return nx.from_pandas_edgelist(df, "u", "v")
+
+
 @st.cache_data
 def load_edgelist_graph(uploaded_file):
     """
-    Loads a graph from an edgelist file (.edges, .txt).
-    Assumes space or tab-delimited nodes.
+    Loads a graph from an edgelist file (.edges, .txt, .csv).
+    Assumes space, tab or comma-delimited nodes.
     """
     try:
-        # Read the uploaded file as text
-        string_data = uploaded_file.getvalue().decode("utf-8")
-        lines = string_data.splitlines()
+        raw = uploaded_file.getvalue()
+        try:
+            G = parse_edgelist_fast(raw)
+        except Exception:
+            # Fall back to NetworkX's line-by-line parser
+            string_data = raw.decode("utf-8")
+            lines = string_data.splitlines()
 
-        # Parse the edgelist. This handles spaces/tabs.
-        G = nx.parse_edgelist(lines)
+            # Parse the edgelist. This handles spaces/tabs.
+            G = nx.parse_edgelist(lines)
 
         if G.number_of_nodes() == 0:
             st.error(
@@ -43,6 +170,14 @@ def load_edgelist_graph(uploaded_file):
             )
             return None
 
+        # Relabel to contiguous ints so every analysis can index flat
+        # arrays; the original label is kept in the 'orig' node attribute.
+        G = nx.convert_node_labels_to_integers(G, label_attribute="orig")
+        # Used as the disk-cache key for the heavy analysis. Hashed after
+        # relabeling: ids follow the file's line order, so the same edges
+        # in another order get other ids and must not share cached arrays.
+        G.graph["hash"] = compute_graph_hash(G)
+
         st.success(
             f"Successfully loaded graph with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges."
         )
@@ -52,6 +187,166 @@ def load_edgelist_graph(uploaded_file):
         return None
 
 
+def run_louvain(G):
+    """
+    Runs Louvain on a graph whose nodes are the ints 0..n-1 and returns
+    the community id of every node as a list.
+    Large graphs go to the Numba kernel in louvain_numba, smaller ones to
+    igraph's C backend; python-louvain is only used if neither is installed.
+    """
+    n = G.number_of_nodes()
+    if louvain_numba is not None and (n >= NUMBA_LOUVAIN_MIN_NODES or ig is None):
+        A = nx.to_scipy_sparse_array(
+            G, nodelist=range(n), format="csr", dtype=np.float64
+        )
+        return louvain_numba.best_partition(A.indptr, A.indices, A.data).tolist()
+    if ig is not None:
+        return ig.Graph(n=n, edges=list(G.edges())).community_multilevel().membership
+    if community_louvain is None:
+        raise ImportError(
+            "Community detection needs python-igraph, numba or python-louvain."
+        )
+    partition = community_louvain.best_partition(G)
+    return [partition[i] for i in range(n)]
+
+
+def build_csr(G):
+    """
+    Packs the graph into CSR arrays (indptr, indices).
+    Nodes are the contiguous ints 0..n-1, so row i is node i.
+    """
+    n = G.number_of_nodes()
+    A = nx.to_scipy_sparse_array(G, nodelist=range(n), format="csr")
+    return A.indptr, A.indices
+
+
+@njit(cache=True)
+def scan_bridges(indptr, indices, comm):
+    """
+    Returns the (u, v) index pairs, u < v, of every edge joining two
+    different communities. Counts first so the output arrays are
+    allocated exactly once.
+    """
+    n = len(indptr) - 1
+    count = 0
+    for u in range(n):
+        c = comm[u]
+        if c < 0:
+            continue
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if v > u and comm[v] >= 0 and comm[v] != c:
+                count += 1
+
+    out_u = np.empty(count, dtype=np.int64)
+    out_v = np.empty(count, dtype=np.int64)
+    i = 0
+    for u in range(n):
+        c = comm[u]
+        if c < 0:
+            continue
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if v > u and comm[v] >= 0 and comm[v] != c:
+                out_u[i] = u
+                out_v[i] = v
+                i += 1
+    return out_u, out_v
+
+
+def find_bridges(indptr, indices, comm):
+    """Returns all edges whose endpoints sit in two different communities."""
+    out_u, out_v = scan_bridges(indptr, indices, comm)
+    return list(zip(out_u.tolist(), out_v.tolist()))
+
+
+def update_mixing_matrix(M, comm, u, v, delta):
+    """
+    Adds delta to the community mixing matrix for edge (u, v).
+    Edges touching nodes outside the partition are skipped. A self-loop
+    is counted once, like NetworkX's attribute_mixing_matrix.
+    """
+    c_u, c_v = comm[u], comm[v]
+    if c_u < 0 or c_v < 0:
+        return
+    M[c_u, c_v] += delta
+    if u != v:
+        M[c_v, c_u] += delta
+
+
+def build_mixing_matrix(indptr, indices, comm):
+    """
+    Builds the k x k community mixing matrix from the CSR arrays.
+    Each stored adjacency entry is one (row, col) pair in COO terms,
+    so every edge lands in M in both directions and a self-loop once.
+    """
+    k = int(comm.max(initial=-1)) + 1
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    c_row, c_col = comm[rows], comm[indices]
+    keep = (c_row >= 0) & (c_col >= 0)
+    M = np.zeros((k, k), dtype=np.int64)
+    np.add.at(M, (c_row[keep], c_col[keep]), 1)
+    return M
+
+
+def assortativity_from_M(M):
+    """
+    Attribute assortativity coefficient from a symmetric mixing matrix,
+    r = (Tr(M) * S - ||row_sums||^2) / (S^2 - ||row_sums||^2) with
+    S = M.sum(). Returns 0.0 where r is undefined (no edges, or a
+    single community).
+    """
+    S = M.sum()
+    row_sq = (M.sum(axis=1) ** 2).sum()
+    denom = S**2 - row_sq
+    if denom == 0:
+        return 0.0
+    return float((np.trace(M) * S - row_sq) / denom)
+
+
+def build_modularity_counts(G, comm):
+    """
+    Collects the per-community sums behind the closed-form modularity
+    Q = sum_c [L_c / 2m - (D_c / 2m)^2]:
+    L[c] is twice the number of intra-community edges, D[c] the total
+    degree of community c and m the number of edges.
+    """
+    labels = comm.tolist()
+    L = dict.fromkeys((c for c in set(labels) if c >= 0), 0)
+    D = dict.fromkeys(L, 0)
+    for node, degree in G.degree():
+        if labels[node] >= 0:
+            D[labels[node]] += degree
+    for u, v in G.edges():
+        if labels[u] >= 0 and labels[u] == labels[v]:
+            L[labels[u]] += 2
+    return {"L": L, "D": D, "m": G.number_of_edges()}
+
+
+def update_modularity_counts(counts, comm, u, v, delta):
+    """
+    Applies a single edge add (delta=1) or remove (delta=-1) to the
+    modularity counts. Nodes outside the partition are skipped.
+    """
+    c_u, c_v = int(comm[u]), int(comm[v])
+    for c in (c_u, c_v):
+        if c >= 0:
+            counts["D"][c] += delta
+    if c_u >= 0 and c_u == c_v:
+        counts["L"][c_u] += 2 * delta
+    counts["m"] += delta
+
+
+def modularity_from_counts(counts):
+    """Evaluates modularity Q from the cached counts in O(k)."""
+    two_m = 2 * counts["m"]
+    if two_m == 0:
+        return 0.0
+    return sum(
+        counts["L"].get(c, 0) / two_m - (d / two_m) ** 2 for c, d in counts["D"].items()
+    )
+
+
 # --- FIX 2: LOGIC SPLIT ---
 
 
@@ -59,124 +354,374 @@ def detect_communities_and_analyze(G):
     """
     HEAVY analysis function.
     Runs community detection ONCE and calculates all metrics.
+    Results are persisted on disk, so reloading the same graph in a
+    fresh session skips the recomputation.
+    """
+    graph_hash = G.graph.get("hash") or compute_graph_hash(G)
+    args = (ANALYSIS_CACHE_VERSION, graph_hash, G)
+    cached = _detect_communities_and_analyze.check_call_in_cache(*args)
+    results = _detect_communities_and_analyze(*args)
+    if not cached:
+        # A new entry was written; keep the cache directory bounded
+        memory.reduce_size(bytes_limit=ANALYSIS_CACHE_MAX_BYTES)
+    return results
+
+
+@memory.cache(ignore=["G"])
+def _detect_communities_and_analyze(cache_version, graph_hash, G):
+    """
+    Memoized body of detect_communities_and_analyze, keyed by
+    cache_version and graph_hash.
     """
     # 1. Detect communities (echo chambers)
-    partition = community_louvain.best_partition(G)
+    # comm[i] is the community of node i, as a dense int32 array
+    comm = np.array(run_louvain(G), dtype=np.int32)
 
     # 2. Calculate Modularity
-    modularity = community_louvain.modularity(partition, G)
+    # The per-community counts are also kept for the incremental updates
+    counts = build_modularity_counts(G, comm)
+    modularity = modularity_from_counts(counts)
 
     # 3. Calculate Polarization Score (Attribute Assortativity)
-    # We use the detected partition as the 'community' attribute
-    nx.set_node_attributes(G, partition, "community")
-
-    try:
-        polarization_score = nx.attribute_assortativity_coefficient(G, "community")
-    except Exception:
-        polarization_score = 0.0  # Default to 0 if calculation fails
+    # We use the detected partition as the community attribute; the score
+    # comes straight from the mixing matrix, built with vectorized NumPy
+    # ops over the sparse adjacency
+    indptr, indices = build_csr(G)
+    M = build_mixing_matrix(indptr, indices, comm)
+    polarization_score = assortativity_from_M(M)
 
     # 4. Identify bridge connections
-    bridges = []
-    for u, v in G.edges():
-        # Check if nodes have community attribute before accessing
-        if "community" in G.nodes[u] and "community" in G.nodes[v]:
-            if G.nodes[u]["community"] != G.nodes[v]["community"]:
-                bridges.append((u, v))
-        elif "community" in G.nodes[u] or "community" in G.nodes[v]:
-            pass
+    bridges = find_bridges(indptr, indices, comm)
 
-    return partition, modularity, polarization_score, bridges
+    return comm, modularity, polarization_score, bridges, M, counts
 
 
-def recalculate_metrics(G, original_partition):
+def recalculate_metrics(M, modularity_counts):
     """
     LIGHT analysis function.
-    Uses the "sticky" original partition to recalculate metrics
-    after an edge add/remove. Does NOT re-detect communities.
+    Recalculates metrics after an edge add/remove from the session's
+    partition, with no global re-detection. Adding an edge may move a
+    few nearby nodes (refine_partition_locally); bridges, the mixing
+    matrix M and the modularity counts are kept in step with those
+    moves incrementally by the edit handlers.
     """
-    # 1. Calculate Modularity *using the original partition*
-    modularity = community_louvain.modularity(original_partition, G)
+    # 1. Calculate Modularity *using the current partition*
+    modularity = modularity_from_counts(modularity_counts)
 
-    # 2. Set attributes *using the original partition*
-    # This is crucial. We only set attributes for nodes that
-    # were in the original partition.
-    nx.set_node_attributes(G, original_partition, "community")
+    # 2. Calculate Polarization Score from the cached mixing matrix
+    # M only counts edges between nodes in the partition, so new
+    # nodes are ignored.
+    polarization_score = assortativity_from_M(M)
 
-    # 3. Calculate Polarization Score
-    try:
-        # attribute_assortativity_coefficient gracefully ignores
-        # nodes that don't have the 'community' attribute (e.g., new nodes)
-        polarization_score = nx.attribute_assortativity_coefficient(G, "community")
-    except Exception:
-        polarization_score = 0.0
-
-    # 4. Identify bridge connections *using the original partition*
-    bridges = []
-    for u, v in G.edges():
-        # Check if nodes *exist* in the original partition
-        if u in original_partition and v in original_partition:
-            if original_partition[u] != original_partition[v]:
-                bridges.append((u, v))
+    return modularity, polarization_score
 
-    return modularity, polarization_score, bridges
+
+def group_bridges(bridges, comm):
+    """
+    Buckets bridge edges by the pair of communities they join, as
+    {frozenset((c_u, c_v)): {frozenset((u, v)), ...}}. Intra-community
+    edges are never bridges, so they get no bucket.
+    """
+    labels = comm.tolist()
+    buckets = defaultdict(set)
+    for u, v in bridges:
+        buckets[frozenset((labels[u], labels[v]))].add(frozenset((u, v)))
+    return dict(buckets)
 
 
-def create_interactive_visualization(G, partition):
-    """Creates a Pyvis visualization and returns it as HTML."""
-    net = Network(
-        height="700px", width="100%", bgcolor="#222222", font_color="white", heading=""
-    )
+def list_bridges(bridges_by_cpair):
+    """Flattens the bridge buckets into a list of (u, v) tuples."""
+    return list(map(tuple, chain.from_iterable(bridges_by_cpair.values())))
 
-    # Add nodes with community-based coloring
-    for node, data in G.nodes(data=True):
-        # Use .get() for safety. New nodes won't be in the partition.
-        community_id = partition.get(node)
-        net.add_node(
-            node,
-            label=str(node),
-            group=community_id,
-            title=f"Community: {community_id}",
+
+def update_bridge_buckets(bridges_by_cpair, comm, u, v, added):
+    """
+    Applies a single edge edit to the bridge bucket of its community pair
+    in O(1). Only edges between two nodes of the partition in
+    different communities can be bridges.
+    """
+    c_u, c_v = int(comm[u]), int(comm[v])
+    if c_u < 0 or c_v < 0:
+        return
+    cpair = frozenset((c_u, c_v))
+    if len(cpair) < 2:
+        return
+    edge = frozenset((u, v))
+    if added:
+        bridges_by_cpair.setdefault(cpair, set()).add(edge)
+    elif cpair in bridges_by_cpair:
+        bucket = bridges_by_cpair[cpair]
+        bucket.discard(edge)
+        if not bucket:
+            del bridges_by_cpair[cpair]
+
+
+def move_gain(G, comm, counts, x, target):
+    """
+    Returns the modularity change from moving node x into community
+    target, using the cached L/D counts (O(degree of x)).
+    """
+    source = comm[x]
+    two_m = 2 * counts["m"]
+    if source == target or two_m == 0:
+        return 0.0
+
+    # Self-loops move with x, so they leave the L sums unchanged
+    e_source = e_target = 0
+    for y in G[x]:
+        if y != x:
+            if comm[y] == source:
+                e_source += 1
+            elif comm[y] == target:
+                e_target += 1
+    k = G.degree(x)
+    d_source, d_target = counts["D"][source], counts["D"][target]
+    delta_l = 2 * (e_target - e_source)
+    delta_d2 = 2 * k * (d_target - d_source + k)
+    return delta_l / two_m - delta_d2 / two_m**2
+
+
+def refine_partition_locally(state, u, v):
+    """
+    Re-runs Louvain on the 2-hop neighborhood of a newly added edge (u, v)
+    if moving u into v's community (or v into u's) would raise modularity.
+    Moved nodes keep the global community id most of their new local
+    community came from; split-off groups get fresh ids. The local result
+    is only kept if it raises the global modularity, otherwise the single
+    best move is applied. Returns the number of moved nodes.
+    """
+    G, comm, counts = state.G, state.comm, state.modularity_counts
+    c_u, c_v = int(comm[u]), int(comm[v])
+    if c_u < 0 or c_v < 0 or c_u == c_v:
+        return 0
+    best_gain, best_move = max(
+        (move_gain(G, comm, counts, u, c_v), (u, c_v)),
+        (move_gain(G, comm, counts, v, c_u), (v, c_u)),
+    )
+    if best_gain <= LOCAL_LOUVAIN_MIN_GAIN:
+        return 0
+
+    # 1. Louvain on the ball of radius 2 around the edge, restricted to
+    # nodes of the sticky partition
+    ball = nx.ego_graph(G, u, radius=2).nodes | nx.ego_graph(G, v, radius=2).nodes
+    H = G.subgraph(n for n in ball if comm[n] >= 0)
+    local_nodes = list(H.nodes())
+    members = defaultdict(list)
+    for i, c in enumerate(run_louvain(nx.convert_node_labels_to_integers(H))):
+        members[c].append(local_nodes[i])
+
+    # 2. Map local communities back onto global ids, largest first
+    next_id = state.mixing_matrix.shape[0]
+    claimed = set()
+    new_ids = {}
+    for group in sorted(members.values(), key=len, reverse=True):
+        for c, _ in Counter(comm[group].tolist()).most_common():
+            if c not in claimed:
+                break
+        else:
+            c = next_id
+            next_id += 1
+        claimed.add(c)
+        for n in group:
+            if comm[n] != c:
+                new_ids[n] = c
+
+    # 3. Keep the local result only if it beats the single best move
+    q_before = modularity_from_counts(counts)
+    trial = {"L": defaultdict(int, counts["L"]), "D": defaultdict(int, counts["D"])}
+    trial["m"] = counts["m"]
+    trial_comm = comm.copy()
+    trial_comm[list(new_ids)] = list(new_ids.values())
+    affected = _edges_touching(G, new_ids)
+    for a, b in affected:
+        update_modularity_counts(trial, comm, a, b, -1)
+    for a, b in affected:
+        update_modularity_counts(trial, trial_comm, a, b, 1)
+    if modularity_from_counts(trial) - q_before < best_gain:
+        new_ids = dict([best_move])
+
+    _move_nodes(state, new_ids)
+    return len(new_ids)
+
+
+def _edges_touching(G, nodes):
+    """Returns each edge incident to any of nodes once, as (min, max)."""
+    return {(min(a, b), max(a, b)) for n in nodes for a, b in G.edges(n)}
+
+
+def _move_nodes(state, new_ids):
+    """
+    Moves nodes to new community ids, re-counting only their incident
+    edges in the cached bridge buckets, mixing matrix and modularity counts.
+    """
+    counts = state.modularity_counts
+    k = state.mixing_matrix.shape[0]
+    extra = max(max(new_ids.values()) + 1 - k, 0)
+    if extra:
+        state.mixing_matrix = np.pad(state.mixing_matrix, ((0, extra), (0, extra)))
+        for c in range(k, k + extra):
+            counts["L"][c] = 0
+            counts["D"][c] = 0
+
+    affected = _edges_touching(state.G, new_ids)
+    for a, b in affected:
+        apply_edge_edit(state, a, b, -1)
+    state.comm[list(new_ids)] = list(new_ids.values())
+    for a, b in affected:
+        apply_edge_edit(state, a, b, 1)
+
+
+def get_node_id(state, label, create=False):
+    """
+    Maps a node label typed by the user to its int id.
+    With create=True an unknown label becomes a new node at the end of
+    the id range; otherwise None is returned.
+    """
+    node = state.label_to_int.get(label)
+    if node is None and create:
+        node = len(state.orig_labels)
+        state.G.add_node(node, orig=label)
+        state.label_to_int[label] = node
+        state.orig_labels = np.append(
+            state.orig_labels, np.array([label], dtype=object)
         )
+        state.all_nodes_str.append(str(label))
+        # New nodes stay outside the sticky partition
+        state.comm = np.append(state.comm, np.array([-1], dtype=np.int32))
+    return node
 
-    # Add edges
-    net.add_edges(G.edges())
 
-    # Configure physics for better layout
-    net.set_options(
-        """
-    var options = {
-      "nodes": {
-        "borderWidth": 2,
-        "borderWidthSelected": 4
-      },
-      "edges": {
-        "color": {
-          "inherit": "from"
-        },
-        "smooth": {
-          "type": "continuous"
-        }
-      },
-      "physics": {
-        "forceAtlas2Based": {
-          "gravitationalConstant": -50,
-          "centralGravity": 0.01,
-          "springLength": 100,
-          "springConstant": 0.08
+def apply_edge_edit(state, u, v, delta):
+    """
+    Updates the cached bridge buckets, mixing matrix and modularity counts
+    for one added (delta=1) or removed (delta=-1) edge.
+    """
+    comm = state.comm
+    update_bridge_buckets(state.bridges_by_cpair, comm, u, v, added=delta > 0)
+    update_mixing_matrix(state.mixing_matrix, comm, u, v, delta)
+    update_modularity_counts(state.modularity_counts, comm, u, v, delta)
+
+
+def build_bridge_dataframe(bridges, comm, orig_labels):
+    """
+    Builds the bridge table column by column.
+    New nodes aren't in the partition and show "N/A" as community.
+    """
+    u_idx = np.fromiter((u for u, _ in bridges), dtype=np.int64, count=len(bridges))
+    v_idx = np.fromiter((v for _, v in bridges), dtype=np.int64, count=len(bridges))
+    return pd.DataFrame(
+        {
+            "Node 1": orig_labels[u_idx],
+            "Community 1": [c if c >= 0 else "N/A" for c in comm[u_idx].tolist()],
+            "Node 2": orig_labels[v_idx],
+            "Community 2": [c if c >= 0 else "N/A" for c in comm[v_idx].tolist()],
         },
-        "minVelocity": 0.75,
-        "solver": "forceAtlas2Based"
-      }
-    }
+        copy=False,
+    )
+
+
+def create_interactive_visualization(G, comm, all_nodes_str):
+    """
+    Creates a Pyvis visualization and returns the URL it is served at.
+    Nodes are int ids; all_nodes_str holds their display labels.
+    The HTML is written once per (edge set, partition, labels) to
+    static/graph_<hash>.html, so the browser fetches and caches it
+    instead of receiving the whole page inline on every rerun.
+    Every edit writes a new file, so the folder is pruned afterwards.
     """
+    edges_key = tuple(sorted(G.edges()))
+    comm_bytes = comm.tobytes()
+    labels_key = tuple(all_nodes_str)
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.asarray(edges_key, dtype=np.int64).tobytes())
+    h.update(comm_bytes)
+    h.update("\0".join(map(str, labels_key)).encode("utf-8"))
+    filename = f"graph_{h.hexdigest()}.html"
+
+    path = os.path.join(STATIC_DIR, filename)
+    try:
+        # Mark it as recently used so pruning keeps it
+        os.utime(path)
+    except FileNotFoundError:
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        # Sessions are threads of one process, so every write gets its own
+        # temp file; the rename then only ever publishes complete files
+        fd, tmp_path = tempfile.mkstemp(dir=STATIC_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(_viz_html(edges_key, comm_bytes, labels_key))
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            # Fine if another session published the same graph meanwhile
+            if not os.path.exists(path):
+                raise
+        prune_static_graphs()
+    return f"app/static/{filename}"
+
+
+def prune_static_graphs(keep=STATIC_GRAPH_MAX_FILES):
+    """
+    Deletes all but the `keep` most recently used graph_*.html files in
+    STATIC_DIR, which the server makes public to every session.
+    """
+    entries = []
+    with os.scandir(STATIC_DIR) as it:
+        for entry in it:
+            if entry.name.startswith("graph_") and entry.name.endswith(".html"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:  # Removed by another session meanwhile
+                    continue
+    entries.sort(reverse=True)
+    for _, path in entries[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _viz_html(edges_key, comm_bytes, labels_key):
+    """Renders the Pyvis HTML for the hashable snapshot built above."""
+    comm = np.frombuffer(comm_bytes, dtype=np.int32)
+    net = Network(
+        height="700px", width="100%", bgcolor="#222222", font_color="white", heading=""
     )
 
-    # Save to an HTML file and return the file's content
+    # Add nodes with community-based coloring, and the edges, in bulk.
+    # Pyvis' add_nodes has no 'group' argument and add_node/add_edge rescan
+    # every existing node id and edge per call, so the node and edge dicts
+    # Pyvis would create are built directly in one pass each. This copies
+    # the Node/Edge option layout and the nodes/node_ids/node_map/edges
+    # attributes of pyvis 0.3.2; requirements.txt pins pyvis to 0.3.x.
+    node_ids = list(range(len(labels_key)))
+    # New nodes aren't in the partition (-1) and get no group
+    groups = [c if c >= 0 else None for c in comm.tolist()]
+    titles = [f"Community: {group}" for group in groups]
+    net.nodes = [
+        {
+            "group": group,
+            "title": title,
+            "id": node,
+            "label": label,
+            "shape": "dot",
+            "font": {"color": net.font_color},
+        }
+        for node, label, group, title in zip(node_ids, labels_key, groups, titles)
+    ]
+    net.node_ids = node_ids
+    net.node_map = {node["id"]: node for node in net.nodes}
+    # NetworkX edges are already unique, so Pyvis' duplicate check is moot
+    net.edges = [{"from": u, "to": v} for u, v in edges_key]
+
+    # Configure physics for better layout
+    net.options = PYVIS_OPTIONS_DICT
+
+    # Render the HTML in memory; no temp file round-trip
     try:
-        net.save_graph(HTML_VIZ_PATH)  # <-- Use robust path
-        with open(HTML_VIZ_PATH, "r", encoding="utf-8") as f:  # <-- Use robust path
-            html_content = f.read()
-        return html_content
+        return net.generate_html(notebook=False)
     except Exception as e:
         return f"Error generating visualization: {e}"
 
@@ -193,8 +738,24 @@ if "G" not in st.session_state:
     st.session_state.G = None
 if "analysis_results" not in st.session_state:
     st.session_state.analysis_results = {}
-if "original_partition" not in st.session_state:  # <-- Store the "sticky" partition
-    st.session_state.original_partition = None
+if "comm" not in st.session_state:  # <-- Store the "sticky" partition, by node id
+    st.session_state.comm = None
+if "mixing_matrix" not in st.session_state:  # <-- Community mixing matrix M
+    st.session_state.mixing_matrix = None
+if "modularity_counts" not in st.session_state:  # <-- Cached L, D and m for Q
+    st.session_state.modularity_counts = None
+if "bridges_by_cpair" not in st.session_state:  # <-- Bridges by community pair
+    st.session_state.bridges_by_cpair = {}
+if "orig_labels" not in st.session_state:  # <-- Node id -> original label
+    st.session_state.orig_labels = None
+if "label_to_int" not in st.session_state:  # <-- Original label -> node id
+    st.session_state.label_to_int = {}
+if "all_nodes_str" not in st.session_state:  # <-- Node labels as strings, by id
+    st.session_state.all_nodes_str = []
+if "viz_url" not in st.session_state:  # <-- Rendered graph URL, None when stale
+    st.session_state.viz_url = None
+if "bridge_df" not in st.session_state:  # <-- Last bridge table, None when stale
+    st.session_state.bridge_df = None
 
 # --- Sidebar for Data Loading and Controls ---
 
@@ -210,20 +771,42 @@ with st.sidebar:
     if st.button("Load and Analyze Network"):
         if uploaded_file:
             st.session_state.G = load_edgelist_graph(uploaded_file)
+            st.session_state.viz_url = None
+            st.session_state.bridge_df = None
 
             # After loading, run the HEAVY analysis
             if st.session_state.G:
-                partition, mod, score, bridges = detect_communities_and_analyze(
-                    st.session_state.G
-                )
+                (
+                    comm,
+                    mod,
+                    score,
+                    bridges,
+                    M,
+                    counts,
+                ) = detect_communities_and_analyze(st.session_state.G)
                 st.session_state.analysis_results = {
-                    "partition": partition,  # Save the partition for the viz
                     "modularity": mod,
                     "polarization_score": score,
                     "bridges": bridges,
                 }
                 # SAVE THE "STICKY" PARTITION
-                st.session_state.original_partition = partition
+                # comm is also what the bridge table and the viz color by
+                st.session_state.comm = comm
+                st.session_state.bridges_by_cpair = group_bridges(bridges, comm)
+                st.session_state.mixing_matrix = M
+                st.session_state.modularity_counts = counts
+                G = st.session_state.G
+                st.session_state.orig_labels = np.array(
+                    [G.nodes[i]["orig"] for i in range(G.number_of_nodes())],
+                    dtype=object,
+                )
+                st.session_state.label_to_int = {
+                    label: i for i, label in enumerate(st.session_state.orig_labels)
+                }
+                # Convert nodes to string once; edits append new nodes
+                st.session_state.all_nodes_str = [
+                    str(label) for label in st.session_state.orig_labels
+                ]
         else:
             st.warning("Please upload a file first.")
 
@@ -236,23 +819,31 @@ with st.sidebar:
     if st.session_state.G:
         col1, col2 = st.columns(2)
         with col1:
-            # Convert nodes to string for text_input
-            all_nodes = [str(n) for n in st.session_state.G.nodes()]
             node1 = st.text_input("Node 1", placeholder="e.g., 'NodeA' or '1'")
         with col2:
             node2 = st.text_input("Node 2", placeholder="e.g., 'NodeB' or '2'")
 
         if st.button("Add Edge", use_container_width=True):
             if node1 and node2:
-                # Add edge (nodes will be converted to string if they are int)
-                st.session_state.G.add_edge(node1, node2)
+                # Unknown labels become new nodes outside the sticky partition
+                u = get_node_id(st.session_state, node1, create=True)
+                v = get_node_id(st.session_state, node2, create=True)
+                # Only a genuinely new edge changes the cached counters
+                if not st.session_state.G.has_edge(u, v):
+                    st.session_state.G.add_edge(u, v)
+                    apply_edge_edit(st.session_state, u, v, 1)
+                    refine_partition_locally(st.session_state, u, v)
+                    st.session_state.viz_url = None
+                    st.session_state.bridge_df = None
 
                 # --- NEW LOGIC ---
                 # Run the LIGHT analysis using the sticky partition
-                mod, score, bridges = recalculate_metrics(
-                    st.session_state.G, st.session_state.original_partition
+                mod, score = recalculate_metrics(
+                    st.session_state.mixing_matrix,
+                    st.session_state.modularity_counts,
                 )
-                # Update results, but KEEP the original partition for the viz
+                bridges = list_bridges(st.session_state.bridges_by_cpair)
+                # Update results; the viz recolors from the refined partition
                 st.session_state.analysis_results.update(
                     {"modularity": mod, "polarization_score": score, "bridges": bridges}
                 )
@@ -262,15 +853,22 @@ with st.sidebar:
 
         if st.button("Remove Edge", use_container_width=True):
             if node1 and node2:
-                if st.session_state.G.has_edge(node1, node2):
-                    st.session_state.G.remove_edge(node1, node2)
+                u = get_node_id(st.session_state, node1)
+                v = get_node_id(st.session_state, node2)
+                if st.session_state.G.has_edge(u, v):
+                    st.session_state.G.remove_edge(u, v)
+                    apply_edge_edit(st.session_state, u, v, -1)
+                    st.session_state.viz_url = None
+                    st.session_state.bridge_df = None
 
                     # --- NEW LOGIC ---
                     # Run the LIGHT analysis using the sticky partition
-                    mod, score, bridges = recalculate_metrics(
-                        st.session_state.G, st.session_state.original_partition
+                    mod, score = recalculate_metrics(
+                        st.session_state.mixing_matrix,
+                        st.session_state.modularity_counts,
                     )
-                    # Update results, but KEEP the original partition for the viz
+                    bridges = list_bridges(st.session_state.bridges_by_cpair)
+                    # Update results; removals leave the partition unchanged
                     st.session_state.analysis_results.update(
                         {
                             "modularity": mod,
@@ -318,27 +916,15 @@ if st.session_state.G:
     st.subheader(f"Identified {len(results.get('bridges', []))} Bridge Connections")
     with st.expander("Show/Hide Bridge Edges"):
         # Create a DataFrame for bridges
-        bridge_df_data = []
-        # Use the original partition for community labels
-        if "partition" in results:
-            partition = results["partition"]
-            for u, v in results.get("bridges", []):
-                bridge_df_data.append(
-                    {
-                        "Node 1": u,
-                        "Community 1": partition.get(u, "N/A"),  # Use .get() for safety
-                        "Node 2": v,
-                        "Community 2": partition.get(v, "N/A"),  # Use .get() for safety
-                    }
-                )
-
-        # This line will now work because pandas is imported
-        st.dataframe(
-            pd.DataFrame(
-                bridge_df_data,
-                columns=["Node 1", "Community 1", "Node 2", "Community 2"],
+        # Use the current, locally refined partition for community labels
+        # Only rebuilt after a load or an edit; other reruns reuse it
+        if st.session_state.bridge_df is None and st.session_state.comm is not None:
+            st.session_state.bridge_df = build_bridge_dataframe(
+                results.get("bridges", []),
+                st.session_state.comm,
+                st.session_state.orig_labels,
             )
-        )
+        st.dataframe(st.session_state.bridge_df)
 
     st.header("Interactive Network Visualization")
     st.write(
@@ -346,12 +932,21 @@ if st.session_state.G:
     )
 
     # Generate and display the interactive graph
-    if "partition" in results:
-        # This will always use the ORIGINAL partition, so colors won't change
-        html_content = create_interactive_visualization(
-            st.session_state.G, results["partition"]
-        )
-        components.html(html_content, height=710)
+    if st.session_state.comm is not None:
+        # Colors follow the current partition: detected on load, then only
+        # changed by the local refinement after an added edge
+        # Only re-render after a load or an edit, or if the file was pruned;
+        # other reruns reuse the file
+        viz_url = st.session_state.viz_url
+        if viz_url is None or not os.path.exists(
+            os.path.join(STATIC_DIR, os.path.basename(viz_url))
+        ):
+            st.session_state.viz_url = create_interactive_visualization(
+                st.session_state.G,
+                st.session_state.comm,
+                st.session_state.all_nodes_str,
+            )
+        components.iframe(st.session_state.viz_url, height=710)
 
 else:
     st.info("Load a network using the sidebar to begin the analysis.")
@@ -0,0 +1,151 @@
+"""
+Numba-compiled Louvain community detection on CSR arrays.
+
+Used by app.py for large graphs and when igraph's C backend is not
+installed. The local-moving sweep runs as native code, with the per-node
+scan spread over threads; aggregation between levels uses scipy.sparse.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from numba import njit, prange
+
+# Upper bound on local-moving sweeps per level
+MAX_PASSES = 100
+
+
+@njit(parallel=True, cache=True)
+def best_targets(indptr, indices, weights, comm, k_i, k_tot, m, target):
+    """
+    Phase 1 of a sweep: for every node in parallel, finds the neighboring
+    community with the largest modularity gain w(u, c) - k_tot[c] * k_i[u] / 2m
+    and stores it in target. comm and k_tot are only read, so threads
+    never write shared state.
+    """
+    n = len(indptr) - 1
+    two_m = 2.0 * m
+    for u in prange(n):
+        c_u = comm[u]
+        k_u = k_i[u]
+
+        # Edge weight from u to each neighboring community, in small
+        # per-node buffers
+        deg = indptr[u + 1] - indptr[u]
+        neigh_comms = np.empty(deg, dtype=np.int64)
+        neigh_weight = np.zeros(deg)
+        n_neigh = 0
+        w_own = 0.0
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if v == u:
+                continue
+            c = comm[v]
+            if c == c_u:
+                w_own += weights[j]
+                continue
+            t = 0
+            while t < n_neigh and neigh_comms[t] != c:
+                t += 1
+            if t == n_neigh:
+                neigh_comms[t] = c
+                n_neigh += 1
+            neigh_weight[t] += weights[j]
+
+        best = c_u
+        best_gain = w_own - (k_tot[c_u] - k_u) * k_u / two_m
+        for t in range(n_neigh):
+            c = neigh_comms[t]
+            gain = neigh_weight[t] - k_tot[c] * k_u / two_m
+            if gain > best_gain:
+                best_gain = gain
+                best = c
+        target[u] = best
+
+
+@njit(cache=True)
+def commit_moves(indptr, indices, weights, comm, k_i, k_tot, m, target):
+    """
+    Phase 2 of a sweep: applies the proposed moves one node at a time.
+    Earlier moves in this phase may have changed the picture, so each
+    move is re-checked against the current comm and k_tot and only made
+    if it still raises modularity. Returns the number of moves.
+    """
+    n = len(indptr) - 1
+    two_m = 2.0 * m
+    moves = 0
+    for u in range(n):
+        c_u = comm[u]
+        c_t = target[u]
+        if c_t == c_u:
+            continue
+        k_u = k_i[u]
+        w_own = 0.0
+        w_target = 0.0
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if v == u:
+                continue
+            if comm[v] == c_u:
+                w_own += weights[j]
+            elif comm[v] == c_t:
+                w_target += weights[j]
+        stay_gain = w_own - (k_tot[c_u] - k_u) * k_u / two_m
+        move_gain = w_target - k_tot[c_t] * k_u / two_m
+        if move_gain > stay_gain:
+            k_tot[c_u] -= k_u
+            k_tot[c_t] += k_u
+            comm[u] = c_t
+            moves += 1
+    return moves
+
+
+def louvain_pass(indptr, indices, weights, comm, k_i, k_tot, m):
+    """
+    One sweep of Louvain local moves over all nodes.
+    Best targets are found in parallel, then committed sequentially,
+    the usual two-phase scheme for shared-memory Louvain.
+    comm and k_tot are updated in place. Returns the number of moves.
+    """
+    target = np.empty_like(comm)
+    best_targets(indptr, indices, weights, comm, k_i, k_tot, m, target)
+    return commit_moves(indptr, indices, weights, comm, k_i, k_tot, m, target)
+
+
+def best_partition(indptr, indices, weights):
+    """
+    Runs multi-level Louvain on a symmetric CSR adjacency and returns
+    the community id of every node as an int64 array (ids 0..k-1).
+    """
+    n = len(indptr) - 1
+    membership = np.arange(n)
+    A = sp.csr_matrix((weights, indices, indptr), shape=(n, n), dtype=np.float64)
+    # A self-loop is stored once on the diagonal but adds 2 to the degree.
+    # Doubling the diagonal makes it count twice in k_i and m, the same
+    # convention as the aggregated levels below, whose diagonal holds
+    # twice the weight inside each community.
+    A = (A + sp.diags(A.diagonal())).tocsr()
+    m = A.sum() / 2.0
+    if m == 0:
+        return membership
+
+    while True:
+        size = A.shape[0]
+        comm = np.arange(size)
+        k_i = np.asarray(A.sum(axis=1)).ravel()
+        k_tot = k_i.copy()
+
+        moved = False
+        for _ in range(MAX_PASSES):
+            if louvain_pass(A.indptr, A.indices, A.data, comm, k_i, k_tot, m) == 0:
+                break
+            moved = True
+        if not moved:
+            return membership
+
+        # Renumber communities to 0..k-1 and collapse each into one node
+        _, comm = np.unique(comm, return_inverse=True)
+        membership = comm[membership]
+        P = sp.csr_matrix(
+            (np.ones(size), (np.arange(size), comm)), shape=(size, comm.max() + 1)
+        )
+        A = (P.T @ A @ P).tocsr()
@@ -0,0 +1,39 @@
+"""
+Checks that the analysis disk-cache key tells apart graphs whose cached
+arrays would not line up: the same edges numbered in another order, and
+labels that only differ in where a space falls.
+"""
+
+import logging
+import random
+
+import networkx as nx
+
+logging.disable(logging.CRITICAL)  # Streamlit warns when run outside `streamlit run`
+
+import app  # noqa: E402
+
+
+def test_graph_hash_depends_on_node_numbering():
+    lines = [f"{u} {v}" for u, v in nx.relaxed_caveman_graph(6, 5, 0.1, seed=0).edges()]
+    shuffled = lines[:]
+    random.Random(0).shuffle(shuffled)
+    graphs = [
+        nx.convert_node_labels_to_integers(
+            app.parse_edgelist_fast("\n".join(ls).encode()), label_attribute="orig"
+        )
+        for ls in (lines, lines[::-1], shuffled)
+    ]
+    hashes = [app.compute_graph_hash(G) for G in graphs]
+    orders = [tuple(G.nodes[i]["orig"] for i in G.nodes()) for G in graphs]
+    # Equal hashes are only allowed for equal id -> label numberings
+    for i in range(len(graphs)):
+        for j in range(i):
+            assert (hashes[i] == hashes[j]) == (orders[i] == orders[j])
+
+    a = app.parse_edgelist_fast(b'"a b","c"\n"x","y"')
+    b = app.parse_edgelist_fast(b'"a","b c"\n"x","y"')
+    a, b = (
+        nx.convert_node_labels_to_integers(G, label_attribute="orig") for G in (a, b)
+    )
+    assert app.compute_graph_hash(a) != app.compute_graph_hash(b)
@@ -0,0 +1,148 @@
+"""
+Regression checks for the incremental analysis in app.py: after random
+edits, every cached structure must equal a rebuild from scratch, and the
+closed-form metrics must match NetworkX.
+"""
+
+import logging
+import random
+from types import SimpleNamespace
+
+import networkx as nx
+import numpy as np
+import pytest
+
+logging.disable(logging.CRITICAL)  # Streamlit warns when run outside `streamlit run`
+
+import app  # noqa: E402
+
+
+def make_graph(seed=0):
+    G = nx.relaxed_caveman_graph(12, 8, 0.15, seed=seed)
+    return nx.convert_node_labels_to_integers(G, label_attribute="orig")
+
+
+def make_state(G):
+    """Session state as the Load handler leaves it, without the disk cache."""
+    comm = np.array(app.run_louvain(G), dtype=np.int32)
+    indptr, indices = app.build_csr(G)
+    bridges = app.find_bridges(indptr, indices, comm)
+    orig_labels = np.array([G.nodes[i]["orig"] for i in G.nodes()], dtype=object)
+    return SimpleNamespace(
+        G=G,
+        comm=comm,
+        mixing_matrix=app.build_mixing_matrix(indptr, indices, comm),
+        modularity_counts=app.build_modularity_counts(G, comm),
+        bridges_by_cpair=app.group_bridges(bridges, comm),
+        orig_labels=orig_labels,
+        label_to_int={label: i for i, label in enumerate(orig_labels)},
+        all_nodes_str=[str(label) for label in orig_labels],
+    )
+
+
+def random_edits(state, steps, new_labels=(), seed=0):
+    """Applies random adds and removes the way the sidebar buttons do."""
+    rng = random.Random(seed)
+    labels = list(state.orig_labels) + list(new_labels)
+    for _ in range(steps):
+        if rng.random() < 0.5:
+            u = app.get_node_id(state, rng.choice(labels), create=True)
+            v = app.get_node_id(state, rng.choice(labels), create=True)
+            if not state.G.has_edge(u, v):
+                state.G.add_edge(u, v)
+                app.apply_edge_edit(state, u, v, 1)
+                app.refine_partition_locally(state, u, v)
+        else:
+            u, v = rng.choice(list(state.G.edges()))
+            state.G.remove_edge(u, v)
+            app.apply_edge_edit(state, u, v, -1)
+
+
+def nonzero(d):
+    return {c: x for c, x in d.items() if x}
+
+
+def as_edge_set(edges):
+    return {frozenset(e) for e in edges}
+
+
+def assert_matches_rebuild(state):
+    """Compares every cached structure with one built from scratch."""
+    assert len(state.comm) == state.G.number_of_nodes()
+
+    indptr, indices = app.build_csr(state.G)
+    M = app.build_mixing_matrix(indptr, indices, state.comm)
+    k = M.shape[0]
+    # Communities emptied by local moves keep their (zero) rows in the cache
+    assert np.array_equal(state.mixing_matrix[:k, :k], M)
+    assert not state.mixing_matrix[k:].any() and not state.mixing_matrix[:, k:].any()
+
+    counts = app.build_modularity_counts(state.G, state.comm)
+    assert nonzero(state.modularity_counts["L"]) == nonzero(counts["L"])
+    assert nonzero(state.modularity_counts["D"]) == nonzero(counts["D"])
+    assert state.modularity_counts["m"] == counts["m"]
+
+    bridges = app.find_bridges(indptr, indices, state.comm)
+    assert as_edge_set(app.list_bridges(state.bridges_by_cpair)) == as_edge_set(bridges)
+
+
+@pytest.mark.parametrize("new_labels", [(), ("new1", "new2")])
+def test_incremental_state_matches_rebuild(new_labels):
+    state = make_state(make_graph())
+    random_edits(state, 300, new_labels)
+    assert_matches_rebuild(state)
+
+
+def test_local_refinement_matches_rebuild():
+    # igraph's Louvain draws from Python's random module
+    random.seed(0)
+    G = nx.gnp_random_graph(60, 0.08, seed=0)
+    state = make_state(nx.convert_node_labels_to_integers(G, label_attribute="orig"))
+
+    # Pull each node towards another community by wiring it to all of that
+    # community's members, so whole groups move and communities split
+    multi_node_moves = growths = 0
+    for x in range(state.G.number_of_nodes()):
+        c = next(c for c in state.comm.tolist() if c != state.comm[x])
+        for v in np.flatnonzero(state.comm == c).tolist():
+            if state.G.has_edge(x, v):
+                continue
+            state.G.add_edge(x, v)
+            app.apply_edge_edit(state, x, v, 1)
+            q_before = app.modularity_from_counts(state.modularity_counts)
+            k = state.mixing_matrix.shape[0]
+
+            moved = app.refine_partition_locally(state, x, v)
+            multi_node_moves += moved > 1
+            growths += state.mixing_matrix.shape[0] > k
+            q_after = app.modularity_from_counts(state.modularity_counts)
+            assert q_after >= q_before - 1e-12
+
+    assert multi_node_moves > 0
+    assert growths > 0
+    assert_matches_rebuild(state)
+
+
+def test_modularity_matches_networkx():
+    state = make_state(make_graph())
+    random_edits(state, 200)
+
+    modularity, _ = app.recalculate_metrics(
+        state.mixing_matrix, state.modularity_counts
+    )
+    communities = [
+        set(np.flatnonzero(state.comm == c).tolist()) for c in np.unique(state.comm)
+    ]
+    assert modularity == pytest.approx(nx.community.modularity(state.G, communities))
+
+
+def test_assortativity_matches_networkx():
+    state = make_state(make_graph())
+    random_edits(state, 200)
+
+    _, score = app.recalculate_metrics(state.mixing_matrix, state.modularity_counts)
+    H = state.G.copy()
+    nx.set_node_attributes(H, dict(enumerate(state.comm.tolist())), "community")
+    assert score == pytest.approx(
+        nx.attribute_assortativity_coefficient(H, "community")
+    )
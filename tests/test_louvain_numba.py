@@ -0,0 +1,47 @@
+"""
+Checks the Numba Louvain kernel against igraph's community_multilevel,
+scoring both partitions with NetworkX's modularity.
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+louvain_numba = pytest.importorskip("louvain_numba")
+ig = pytest.importorskip("igraph")
+
+
+def partition_modularity(G, labels):
+    labels = np.asarray(labels)
+    return nx.community.modularity(
+        G, [set(np.flatnonzero(labels == c).tolist()) for c in np.unique(labels)]
+    )
+
+
+@pytest.mark.parametrize("self_loops", [False, True])
+def test_best_partition_matches_igraph(self_loops):
+    G = nx.relaxed_caveman_graph(12, 8, 0.15, seed=1)
+    if self_loops:
+        # Loops add 2 to a node's degree but sit once on the CSR diagonal
+        G.add_edges_from((i, i) for i in range(0, G.number_of_nodes(), 2))
+    n = G.number_of_nodes()
+    A = nx.to_scipy_sparse_array(G, nodelist=range(n), format="csr", dtype=np.float64)
+
+    comm = louvain_numba.best_partition(A.indptr, A.indices, A.data)
+    assert sorted(set(comm.tolist())) == list(range(comm.max() + 1))
+    membership = ig.Graph(n=n, edges=list(G.edges())).community_multilevel().membership
+
+    assert partition_modularity(G, comm) == pytest.approx(
+        partition_modularity(G, membership), abs=0.02
+    )
+
+
+def test_self_loops_count_twice_in_degrees():
+    # Optimum is {0}, {1}, {2, 3} (Q = 0.2245). With each loop counted once
+    # in k_i and m, the kernel settled on {0, 1}, {2, 3} (Q = 0.2041).
+    G = nx.Graph([(0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2), (2, 3)])
+    A = nx.to_scipy_sparse_array(G, nodelist=range(4), format="csr", dtype=np.float64)
+    comm = louvain_numba.best_partition(A.indptr, A.indices, A.data)
+    assert partition_modularity(G, comm) == pytest.approx(
+        partition_modularity(G, [0, 1, 2, 2])
+    )